@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+
+import httpx
+
+# One connection pool per event loop, shared by every UpstoxClient running on
+# it. Auth is sent per request, so nothing client-specific lives on the pool.
+# Pooled connections are bound to the loop that opened them, hence the keying;
+# call aclose_shared_client() before that loop closes.
+_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def shared_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _CLIENTS.get(loop)
+    if client is None or client.is_closed:
+        client = _CLIENTS[loop] = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=40, keepalive_expiry=30),
+            timeout=httpx.Timeout(20.0, connect=5.0),
+        )
+    return client
+
+
+async def aclose_shared_client() -> None:
+    client = _CLIENTS.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
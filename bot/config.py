@@ -7,7 +7,7 @@ from typing import Optional
 from dotenv import load_dotenv
 
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     api_key: Optional[str]
     api_secret: Optional[str]
@@ -1,18 +1,34 @@
 from __future__ import annotations
 
-import argparse
+import asyncio
+import logging
+import logging.handlers
+import queue
 import sys
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
+from ._http import aclose_shared_client
 from .config import Config, build_instrument_key
-from .strategy import run_threshold_strategy
-from .upstox_client import UpstoxClient
+from .strategy import run_threshold_strategies
+from .upstox_client import HAS_FEED_PROTO, HAS_WEBSOCKET, UpstoxClient
+
+if TYPE_CHECKING:
+    import argparse
+
+log = logging.getLogger(__name__)
 
 
 def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    # Imported here so `import bot.runner` does not pay for argparse
+    import argparse
+
     parser = argparse.ArgumentParser(description="Simple Upstox Threshold Trading Bot")
     g_instrument = parser.add_mutually_exclusive_group(required=False)
-    g_instrument.add_argument("--instrument-key", help="Instrument key like NSE_EQ|RELIANCE")
+    g_instrument.add_argument(
+        "--instrument-key",
+        action="append",
+        help="Instrument key like NSE_EQ|RELIANCE; repeat to trade several concurrently",
+    )
 
     parser.add_argument("--exchange", default="NSE_EQ", help="Exchange segment, e.g., NSE_EQ")
     parser.add_argument("--symbol", help="Trading symbol, e.g., RELIANCE")
@@ -24,38 +40,95 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     parser.add_argument("--cooldown", type=float, default=5.0, help="Cooldown seconds between trades")
     parser.add_argument("--max-trades", type=int, help="Stop after N trades")
     parser.add_argument("--dry-run", action="store_true", help="Do not place live orders")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Logging verbosity; DEBUG also logs every fetched LTP",
+    )
 
     return parser.parse_args(argv)
 
 
+def configure_logging(level: str) -> logging.handlers.QueueListener:
+    """Route log records through a queue so the polling loop never blocks on the terminal.
+
+    Records below WARNING go to stdout, WARNING and above to stderr. The returned listener
+    owns the formatting/writing thread; stop() it to flush on exit.
+    """
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    formatter = logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    out = logging.StreamHandler(sys.stdout)
+    out.addFilter(lambda record: record.levelno < logging.WARNING)
+    err = logging.StreamHandler(sys.stderr)
+    err.setLevel(logging.WARNING)
+    for handler in (out, err):
+        handler.setFormatter(formatter)
+    listener = logging.handlers.QueueListener(records, out, err, respect_handler_level=True)
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(records)]
+    root.setLevel(level)
+    listener.start()
+    return listener
+
+
+async def _run(client: UpstoxClient, instrument_keys: list[str], args: argparse.Namespace) -> None:
+    # Pool connections are bound to this event loop, so warm up inside it
+    if client.config.access_token and not client.dry_run:
+        await client.warmup()
+
+    try:
+        await run_threshold_strategies(
+            client=client,
+            instrument_keys=instrument_keys,
+            buy_below=args.buy_below,
+            sell_above=args.sell_above,
+            quantity=args.quantity,
+            poll_interval_sec=args.interval,
+            max_trades=args.max_trades,
+            cooldown_sec=args.cooldown,
+        )
+    finally:
+        # The pool is bound to this loop, which asyncio.run closes next
+        await aclose_shared_client()
+
+
 def main(argv: Optional[list[str]] = None) -> int:
     args = parse_args(argv)
+    listener = configure_logging(args.log_level)
+    try:
+        return _main(args)
+    finally:
+        listener.stop()
+
 
+def _main(args: argparse.Namespace) -> int:
     cfg = Config.from_env()
 
-    instrument_key = args.instrument_key
-    if not instrument_key:
+    instrument_keys = args.instrument_key
+    if not instrument_keys:
         if not args.symbol:
-            print("Either --instrument-key or --symbol is required", file=sys.stderr)
+            log.error("Either --instrument-key or --symbol is required")
             return 2
-        instrument_key = build_instrument_key(args.exchange, args.symbol)
+        instrument_keys = [build_instrument_key(args.exchange, args.symbol)]
 
     client = UpstoxClient(config=cfg, dry_run=args.dry_run)
 
     if not cfg.access_token and not args.dry_run:
-        print("UPSTOX_ACCESS_TOKEN not found. Running in dry-run. Add --dry-run to silence.")
+        log.warning("UPSTOX_ACCESS_TOKEN not found. Running in dry-run. Add --dry-run to silence.")
         client.dry_run = True
 
-    run_threshold_strategy(
-        client=client,
-        instrument_key=instrument_key,
-        buy_below=args.buy_below,
-        sell_above=args.sell_above,
-        quantity=args.quantity,
-        poll_interval_sec=args.interval,
-        max_trades=args.max_trades,
-        cooldown_sec=args.cooldown,
-    )
+    if cfg.access_token and HAS_WEBSOCKET and HAS_FEED_PROTO:
+        for instrument_key in instrument_keys:
+            client.subscribe(instrument_key)
+    elif cfg.access_token and HAS_WEBSOCKET:
+        log.warning("upstox-python-sdk not installed; cannot decode the market-data feed, polling LTP over HTTP.")
+
+    try:
+        asyncio.run(_run(client, instrument_keys, args))
+    finally:
+        client.close()
 
     return 0
 
@@ -1,23 +1,142 @@
 from __future__ import annotations
 
+import asyncio
+import logging
+import random
 import signal
-import sys
 import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Callable, Optional
 
-from .upstox_client import UpstoxClient
+from .upstox_client import UpstoxClient, _import_numpy
 
+log = logging.getLogger(__name__)
 
-@dataclass
+# Ceiling for the retry delay after consecutive LTP fetch failures
+MAX_BACKOFF_SEC = 60.0
+
+
+@dataclass(slots=True)
 class StrategyState:
     instrument_key: str
     position_qty: int = 0
     total_trades: int = 0
-    last_trade_time: float = 0.0
+    last_trade_time: float = float("-inf")  # time.monotonic() of the last fill
+    fetch_failures: int = 0
+
+
+@dataclass(slots=True, frozen=True)
+class SimulatedTrade:
+    time: float
+    side: str
+    quantity: int
+    price: float
+
+
+def simulate_threshold_strategy(
+    *,
+    client: UpstoxClient,
+    instrument_key: str,
+    times: Any,
+    buy_below: Optional[float] = None,
+    sell_above: Optional[float] = None,
+    quantity: int = 1,
+    max_trades: Optional[int] = None,
+    cooldown_sec: float = 5.0,
+) -> list[SimulatedTrade]:
+    """Backtest run_threshold_strategy over the dry-run price path at the given epoch seconds.
 
+    times must be sorted ascending (ties allowed), as the poll times of a live run would be.
 
-def run_threshold_strategy(
+    Prices and threshold crossings are computed in one NumPy pass; Python only steps from
+    trade to trade, so the cost scales with the number of trades rather than ticks. Makes
+    the same decisions as the live loop polled at the same times.
+    """
+    if buy_below is None and sell_above is None:
+        raise ValueError("Provide buy_below and/or sell_above threshold")
+    np = _import_numpy("simulate_threshold_strategy")
+
+    times = np.asarray(times, dtype=float)
+    if np.any(np.diff(times) < 0):
+        raise ValueError("times must be sorted ascending")
+    prices = client.get_ltp_series(instrument_key, times)
+    no_ticks = np.empty(0, dtype=np.intp)
+    buy_idx = np.flatnonzero(prices <= buy_below) if buy_below is not None else no_ticks
+    sell_idx = np.flatnonzero(prices >= sell_above) if sell_above is not None else no_ticks
+    sellable = prices >= sell_above if sell_above is not None else np.zeros(len(times), dtype=bool)
+
+    def first_at_or_after(candidates: Any, lo: int) -> Optional[int]:
+        pos = int(np.searchsorted(candidates, lo))
+        return int(candidates[pos]) if pos < len(candidates) else None
+
+    trades: list[SimulatedTrade] = []
+    position_qty = 0
+    next_tick = 0
+    last_trade_time = float("-inf")
+    while max_trades is None or len(trades) < max_trades:
+        # Earliest tick that is both unvisited and past the cooldown
+        lo = max(next_tick, int(np.searchsorted(times, last_trade_time + cooldown_sec)))
+        tick = first_at_or_after(sell_idx if position_qty else buy_idx, lo)
+        if tick is None:
+            break
+        t, price = float(times[tick]), float(prices[tick])
+        if position_qty == 0:
+            trades.append(SimulatedTrade(t, "BUY", quantity, price))
+            position_qty = quantity
+            # The live loop checks the sell leg on the same tick, before cooldown applies
+            if sellable[tick]:
+                trades.append(SimulatedTrade(t, "SELL", position_qty, price))
+                position_qty = 0
+        else:
+            trades.append(SimulatedTrade(t, "SELL", position_qty, price))
+            position_qty = 0
+        last_trade_time = t
+        next_tick = tick + 1
+
+    return trades
+
+
+def _stop_on_sigint(stop: asyncio.Event) -> Callable[[], None]:
+    """Set stop on Ctrl-C; returns a callable that removes the handler again."""
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGINT, stop.set)
+    except (NotImplementedError, RuntimeError):  # Windows, or not the main thread
+        return lambda: None
+    return lambda: loop.remove_signal_handler(signal.SIGINT)
+
+
+async def _wait_or_stop(stop: asyncio.Event, timeout: float) -> None:
+    """Sleep for timeout seconds, returning early as soon as stop is set."""
+    try:
+        await asyncio.wait_for(stop.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def run_threshold_strategies(
+    *,
+    client: UpstoxClient,
+    instrument_keys: list[str],
+    **kwargs: Any,
+) -> None:
+    """Run run_threshold_strategy for each instrument concurrently, sharing one stop event.
+
+    To stop from another thread, pass your own event via run_threshold_strategy(stop=...)
+    and set it with loop.call_soon_threadsafe(stop.set).
+    """
+    stop = asyncio.Event()
+    remove_handler = _stop_on_sigint(stop)
+    try:
+        await asyncio.gather(*(
+            run_threshold_strategy(client=client, instrument_key=key, stop=stop, **kwargs)
+            for key in instrument_keys
+        ))
+    finally:
+        remove_handler()
+
+
+async def run_threshold_strategy(
     *,
     client: UpstoxClient,
     instrument_key: str,
@@ -27,65 +146,84 @@ def run_threshold_strategy(
     poll_interval_sec: float = 2.0,
     max_trades: Optional[int] = None,
     cooldown_sec: float = 5.0,
+    stop: Optional[asyncio.Event] = None,
 ) -> None:
     if buy_below is None and sell_above is None:
         raise ValueError("Provide buy_below and/or sell_above threshold")
 
     state = StrategyState(instrument_key=instrument_key)
 
-    stop = False
-
-    def handle_sigint(_sig, _frame):
-        nonlocal stop
-        stop = True
+    remove_handler: Callable[[], None] = lambda: None
+    if stop is None:
+        stop = asyncio.Event()
+        remove_handler = _stop_on_sigint(stop)
 
-    signal.signal(signal.SIGINT, handle_sigint)
+    # Hot-loop lookups hoisted into locals
+    _monotonic = time.monotonic
+    get_ltp = client.get_ltp
+    place_market_order = client.place_market_order
 
-    while not stop:
-        if max_trades is not None and state.total_trades >= max_trades:
-            print("Reached max_trades; exiting.")
-            break
-
-        try:
-            quote = client.get_ltp(instrument_key)
-            last_price = quote.last_price
-        except Exception as exc:  # resilient fetch
-            print(f"LTP fetch failed: {exc}")
-            time.sleep(poll_interval_sec)
-            continue
+    try:
+        while not stop.is_set():
+            if max_trades is not None and state.total_trades >= max_trades:
+                log.info("%s: reached max_trades; exiting.", instrument_key)
+                break
 
-        now = time.time()
-        can_trade = now - state.last_trade_time >= cooldown_sec
-
-        if buy_below is not None and state.position_qty == 0 and last_price <= buy_below and can_trade:
             try:
-                resp = client.place_market_order(
-                    instrument_key=instrument_key,
-                    transaction_type="BUY",
-                    quantity=quantity,
+                quote = await get_ltp(instrument_key)
+                last_price = quote.last_price
+            except Exception as exc:  # resilient fetch, backing off exponentially with jitter
+                state.fetch_failures += 1
+                # Exponent capped so a long outage cannot overflow the float conversion
+                backoff = poll_interval_sec * 2.0 ** min(state.fetch_failures, 32)
+                delay = min(MAX_BACKOFF_SEC, backoff) + random.random()
+                log.warning(
+                    "%s: LTP fetch failed (%d in a row), retrying in %.1fs: %s",
+                    instrument_key, state.fetch_failures, delay, exc,
                 )
-                state.position_qty += quantity
-                state.total_trades += 1
-                state.last_trade_time = now
-                print(f"BUY {quantity} @ {last_price} -> {resp}")
-            except Exception as exc:
-                print(f"BUY failed: {exc}")
-
-        if sell_above is not None and state.position_qty > 0 and last_price >= sell_above and can_trade:
-            try:
-                resp = client.place_market_order(
-                    instrument_key=instrument_key,
-                    transaction_type="SELL",
-                    quantity=state.position_qty,
-                )
-                print(f"SELL {state.position_qty} @ {last_price} -> {resp}")
-                state.total_trades += 1
-                state.position_qty = 0
-                state.last_trade_time = now
-            except Exception as exc:
-                print(f"SELL failed: {exc}")
-
-        time.sleep(poll_interval_sec)
-
-    if state.position_qty > 0:
-        print(f"Exiting with open position: {state.position_qty} shares. Manage risk appropriately.")
+                await _wait_or_stop(stop, delay)
+                continue
+            state.fetch_failures = 0
+            log.debug("%s: LTP %s", instrument_key, last_price)
+
+            now = _monotonic()
+            can_trade = now - state.last_trade_time >= cooldown_sec
+
+            if buy_below is not None and state.position_qty == 0 and last_price <= buy_below and can_trade:
+                try:
+                    resp = await place_market_order(
+                        instrument_key=instrument_key,
+                        transaction_type="BUY",
+                        quantity=quantity,
+                    )
+                    state.position_qty += quantity
+                    state.total_trades += 1
+                    state.last_trade_time = now
+                    log.info("%s: BUY %d @ %s -> %s", instrument_key, quantity, last_price, resp)
+                except Exception as exc:
+                    log.error("%s: BUY failed: %s", instrument_key, exc)
+
+            if sell_above is not None and state.position_qty > 0 and last_price >= sell_above and can_trade:
+                try:
+                    resp = await place_market_order(
+                        instrument_key=instrument_key,
+                        transaction_type="SELL",
+                        quantity=state.position_qty,
+                    )
+                    log.info("%s: SELL %d @ %s -> %s", instrument_key, state.position_qty, last_price, resp)
+                    state.total_trades += 1
+                    state.position_qty = 0
+                    state.last_trade_time = now
+                except Exception as exc:
+                    log.error("%s: SELL failed: %s", instrument_key, exc)
+
+            await _wait_or_stop(stop, poll_interval_sec)
+    finally:
+        # Also runs on cancellation, which except Exception above does not catch
+        remove_handler()
+
+        if state.position_qty > 0:
+            log.warning(
+                "%s: exiting with open position: %d shares. Manage risk appropriately.",
+                instrument_key, state.position_qty,
+            )
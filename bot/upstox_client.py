@@ -1,13 +1,20 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
+import random
+import threading
 import time
+import uuid
+import zlib
 from dataclasses import dataclass
 import math
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Tuple
 
-import requests
+import httpx
+import orjson
 
+from ._http import shared_client
 from .config import Config
 
 try:
@@ -29,25 +36,139 @@ except Exception:  # pragma: no cover - optional dependency
     TransactionType = None  # type: ignore
     HAS_UPSTOX_SDK = False
 
+try:
+    # websocket-client, used for the push market-data feed. Optional.
+    import websocket
+
+    HAS_WEBSOCKET = True
+except Exception:  # pragma: no cover - optional dependency
+    websocket = None  # type: ignore
+    HAS_WEBSOCKET = False
+
+try:
+    # Protobuf schema for the v2 market-data feed, shipped with the newer Upstox SDK. Optional.
+    from google.protobuf.json_format import MessageToDict
+    from upstox_client.feeder.proto import MarketDataFeed_pb2
+
+    HAS_FEED_PROTO = True
+except Exception:  # pragma: no cover - optional dependency
+    MessageToDict = None  # type: ignore
+    MarketDataFeed_pb2 = None  # type: ignore
+    HAS_FEED_PROTO = False
+
+try:
+    # msgspec, used for schema-driven LTP response decoding. Optional.
+    import msgspec
+
+    HAS_MSGSPEC = True
+except Exception:  # pragma: no cover - optional dependency
+    msgspec = None  # type: ignore
+    HAS_MSGSPEC = False
+
 
-@dataclass
+log = logging.getLogger(__name__)
+
+# Ceiling for the delay between market-data feed reconnect attempts
+WS_MAX_BACKOFF_SEC = 60.0
+
+
+def _import_numpy(feature: str) -> Any:
+    """NumPy is optional and heavy to import, so only the vectorised simulation pulls it in."""
+    try:
+        import numpy
+    except ImportError as exc:  # pragma: no cover - optional dependency
+        raise RuntimeError(f"numpy is required for {feature}") from exc
+    return numpy
+
+
+# Upper bound on instrument keys per /market/quotes/ltp request
+LTP_BATCH_SIZE = 500
+
+# Fields that may carry the price in an LTP node, in order of preference
+_LTP_PRICE_FIELDS = ("ltp", "last_price", "last_traded_price", "close")
+
+_ONE_THIRD = 1.0 / 3.0
+
+
+@dataclass(slots=True, frozen=True)
 class LtpQuote:
     instrument_key: str
     last_price: float
     timestamp: Optional[str]
 
 
+if HAS_MSGSPEC:
+
+    class _LtpNode(msgspec.Struct):
+        instrument_token: Optional[str] = None
+        ltp: Optional[float] = None
+        last_price: Optional[float] = None
+        last_traded_price: Optional[float] = None
+        close: Optional[float] = None
+        timestamp: Optional[str] = None
+        exchange_timestamp: Optional[str] = None
+
+    class _LtpResponse(msgspec.Struct):
+        data: Dict[str, _LtpNode] = {}
+
+    _LTP_DECODER = msgspec.json.Decoder(_LtpResponse)
+
+
+def _quote_from_ltp_struct(instrument_key: str, node: Any) -> Optional[LtpQuote]:
+    last_price = node.ltp or node.last_price or node.last_traded_price or node.close
+    if last_price is None:
+        return None
+    return LtpQuote(
+        instrument_key=instrument_key,
+        last_price=float(last_price),
+        timestamp=node.timestamp or node.exchange_timestamp,
+    )
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+@dataclass(slots=True)
+class CircuitBreaker:
+    """Stops calling the API for open_sec after max_failures consecutive transport/5xx/429 failures."""
+
+    max_failures: int = 5
+    open_sec: float = 30.0
+    failures: int = 0
+    open_until: float = 0.0
+
+    def check(self) -> None:
+        remaining = self.open_until - time.monotonic()
+        if remaining > 0:
+            raise CircuitOpenError(f"Upstox API circuit open for another {remaining:.1f}s")
+
+    def record_success(self) -> None:
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.max_failures:
+            self.open_until = time.monotonic() + self.open_sec
+            self.failures = 0
+
+
 class UpstoxClient:
+    # Fields shared by every market order payload
+    _ORDER_TEMPLATE: Dict[str, Any] = {"product": "I", "order_type": "MARKET", "validity": "DAY"}
+
     def __init__(self, config: Config, dry_run: bool = False) -> None:
         self.config = config
         self.dry_run = dry_run
-        self._session = requests.Session()
-        self._session.headers.update({
+        self._base = config.base_url.rstrip("/")
+        self._url_cache: Dict[str, str] = {}
+        # The HTTP pool is shared process-wide, so auth travels with each request
+        self._headers: Dict[str, str] = {
             "Accept": "application/json",
             "Content-Type": "application/json",
-        })
+        }
         if self.config.access_token:
-            self._session.headers["Authorization"] = f"Bearer {self.config.access_token}"
+            self._headers["Authorization"] = f"Bearer {self.config.access_token}"
 
         self._sdk = None
         if HAS_UPSTOX_SDK and self.config.access_token:
@@ -57,71 +178,453 @@ class UpstoxClient:
             except Exception:
                 self._sdk = None
 
-        # Simple in-memory price simulator for dry-run when no credentials are available
-        self._sim_prices: Dict[str, float] = {}
+        # Simple in-memory price simulator for dry-run when no credentials are available;
+        # per-key (base, phase1, phase2) so each tick is just the two sines
+        self._sim_params: Dict[str, Tuple[float, float, float]] = {}
+
+        # Push feed state: the websocket thread writes, get_ltp reads
+        self._ws_app: Any = None
+        self._ws_thread: Optional[threading.Thread] = None
+        self._ws_stop = threading.Event()
+        self._ws_lock = threading.Lock()
+        self._ws_keys: set[str] = set()
+        self._ws_failures = 0  # reconnects in a row without a successful open
+        # Pushed quotes keyed by instrument, with the time.monotonic() they arrived at
+        self._ltp_cache: Dict[str, Tuple[float, LtpQuote]] = {}
+        # Keys whose first get_ltp still waits for a tick, and the (loop, future) each waiter
+        # parked; the feed thread resolves it via call_soon_threadsafe, so no thread blocks
+        self._ltp_unwaited: set[str] = set()
+        self._ltp_waiters: Dict[str, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self.ws_first_tick_timeout = 10.0
+        # Pushed quotes older than this are treated as missing and fetched over REST
+        self.ws_max_quote_age = 5.0
+
+        # Short-lived REST quote cache; concurrent callers share one in-flight fetch per key
+        self.ltp_ttl = 0.5
+        self._ltp_ttl_cache: Dict[str, Tuple[float, LtpQuote]] = {}
+        self._ltp_inflight: Dict[str, asyncio.Task] = {}
+
+        # LTP node parser specialised to the response shape seen on the first quote
+        self._ltp_parse_fn: Optional[Callable[[str, Dict[str, Any]], LtpQuote]] = None
+        self._ltp_params: Dict[str, Dict[str, str]] = {}
+
+        self._breaker = CircuitBreaker()
 
     # ---------------------- HTTP helpers ----------------------
-    def _request(self, method: str, path: str, **kwargs: Any) -> Dict[str, Any]:
-        url = f"{self.config.base_url.rstrip('/')}/{path.lstrip('/')}"
-        resp = self._session.request(method=method.upper(), url=url, timeout=20, **kwargs)
+    async def _request(self, method: str, path: str, **kwargs: Any) -> Dict[str, Any]:
+        return self._parse_response(await self._send(method, path, **kwargs))
+
+    async def _send(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        url = self._url_cache.get(path) or self._url_cache.setdefault(path, f"{self._base}/{path.lstrip('/')}")
+        headers = {**self._headers, **kwargs.pop("headers", {})}
+        self._breaker.check()
+        try:
+            resp = await shared_client().request(method.upper(), url, headers=headers, **kwargs)
+        except httpx.TransportError:
+            self._breaker.record_failure()
+            raise
+        # Server-side trouble trips the breaker; ordinary 4xx answers (bad order etc.) do not
+        if resp.status_code >= 500 or resp.status_code == 429:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+        return resp
+
+    @staticmethod
+    def _parse_response(resp: httpx.Response) -> Dict[str, Any]:
         try:
-            data = resp.json()
+            data = orjson.loads(resp.content)
         except Exception:
             data = {"raw": resp.text}
-        if not resp.ok:
+        if not resp.is_success:
             raise RuntimeError(f"Upstox API error {resp.status_code}: {data}")
         return data if isinstance(data, dict) else {"data": data}
 
+    async def warmup(self) -> None:
+        """Open a pooled connection (DNS + TCP + TLS) ahead of the first real request.
+
+        The pool speaks HTTP/2, which multiplexes concurrent requests over one connection,
+        so a single connection is all that needs warming.
+        """
+        try:
+            await shared_client().head(self._base, headers=self._headers)
+        except httpx.HTTPError:
+            pass  # best effort; the first real request retries the handshake
+
+    # ---------------------- Market data feed ------------------
+    def subscribe(self, instrument_key: str) -> None:
+        """Subscribe to pushed LTP updates for instrument_key over the v2 market-data websocket."""
+        if not HAS_WEBSOCKET:
+            raise RuntimeError("websocket-client is required for the market-data feed")
+        if not HAS_FEED_PROTO:
+            # The v2 feed only sends protobuf frames
+            raise RuntimeError("upstox-python-sdk (MarketDataFeed protobuf schema) is required for the market-data feed")
+        if not self.config.access_token:
+            raise RuntimeError("No Upstox credentials available for the feed. Provide UPSTOX_ACCESS_TOKEN.")
+
+        with self._ws_lock:
+            if instrument_key in self._ws_keys:
+                return
+            self._ws_keys.add(instrument_key)
+            self._ltp_unwaited.add(instrument_key)
+            app = self._ws_app
+
+        if self._ws_thread is None:
+            self._ws_stop.clear()
+            self._ws_thread = threading.Thread(target=self._ws_run, name="upstox-feed", daemon=True)
+            self._ws_thread.start()
+        elif app is not None:
+            # Already connected; on_open covers keys added before the connection came up
+            self._ws_send_sub(app, [instrument_key])
+
+    def close(self) -> None:
+        self._ws_stop.set()
+        app = self._ws_app
+        if app is not None:
+            app.close()
+        if self._ws_thread is not None:
+            self._ws_thread.join(timeout=5)
+            self._ws_thread = None
+
+    def _ws_url(self) -> str:
+        base = self._base
+        if base.startswith("https://"):
+            base = "wss://" + base[len("https://"):]
+        elif base.startswith("http://"):
+            base = "ws://" + base[len("http://"):]
+        return f"{base}/feed/market-data-feed"
+
+    def _ws_run(self) -> None:
+        header = [
+            f"Authorization: Bearer {self.config.access_token}",
+            "Api-Version: 2.0",
+        ]
+        while not self._ws_stop.is_set():
+            app = websocket.WebSocketApp(
+                self._ws_url(),
+                header=header,
+                on_open=self._ws_on_open,
+                on_message=self._ws_on_message,
+                on_error=self._ws_on_error,
+                on_close=self._ws_on_close,
+            )
+            self._ws_app = app
+            try:
+                app.run_forever()
+            except Exception as exc:
+                log.warning("Market-data feed crashed: %s", exc)
+            self._ws_app = None
+            # Disconnected: drop pushed quotes so nothing trades on a price frozen at the drop
+            with self._ws_lock:
+                self._ltp_cache.clear()
+            if self._ws_stop.is_set():
+                break
+            # Reconnect with exponential backoff and jitter (exponent capped to avoid overflow),
+            # so a rejected token or handshake does not hammer the endpoint
+            self._ws_failures += 1
+            delay = min(WS_MAX_BACKOFF_SEC, 2.0 ** min(self._ws_failures - 1, 32)) + random.random()
+            log.warning("Market-data feed disconnected; reconnecting in %.1fs", delay)
+            self._ws_stop.wait(delay)
+
+    def _ws_on_error(self, _app: Any, error: Any) -> None:
+        if not self._ws_stop.is_set():
+            log.warning("Market-data feed error: %s", error)
+
+    def _ws_on_close(self, _app: Any, status_code: Any, reason: Any) -> None:
+        if not self._ws_stop.is_set():
+            log.warning("Market-data feed closed (status %s): %s", status_code, reason)
+
+    def _ws_on_open(self, app: Any) -> None:
+        self._ws_failures = 0
+        with self._ws_lock:
+            keys = sorted(self._ws_keys)
+        if keys:
+            self._ws_send_sub(app, keys)
+
+    @staticmethod
+    def _ws_send_sub(app: Any, keys: list[str]) -> None:
+        message = {
+            "guid": uuid.uuid4().hex,
+            "method": "sub",
+            "data": {"mode": "ltpc", "instrumentKeys": keys},
+        }
+        # The v2 feed expects subscription requests as binary frames
+        app.send(orjson.dumps(message), opcode=websocket.ABNF.OPCODE_BINARY)
+
+    @staticmethod
+    def _decode_feed_message(message: Any) -> Dict[str, Any]:
+        if isinstance(message, bytes) and HAS_FEED_PROTO:
+            feed = MarketDataFeed_pb2.FeedResponse()
+            feed.ParseFromString(message)
+            return MessageToDict(feed)
+        data = orjson.loads(message)
+        return data if isinstance(data, dict) else {}
+
+    def _ws_on_message(self, _app: Any, message: Any) -> None:
+        try:
+            data = self._decode_feed_message(message)
+        except Exception as exc:
+            log.warning("Dropping undecodable market-data frame (%d bytes): %s", len(message), exc)
+            return
+        feeds = data.get("feeds")
+        if not isinstance(feeds, dict):
+            return
+        for instrument_key, feed in feeds.items():
+            ltpc = feed.get("ltpc") if isinstance(feed, dict) else None
+            if not isinstance(ltpc, dict) or ltpc.get("ltp") is None:
+                continue
+            timestamp = ltpc.get("ltt")
+            quote = LtpQuote(
+                instrument_key=instrument_key,
+                last_price=float(ltpc["ltp"]),
+                timestamp=str(timestamp) if timestamp is not None else None,
+            )
+            with self._ws_lock:
+                self._ltp_cache[instrument_key] = (time.monotonic(), quote)
+                waiter = self._ltp_waiters.pop(instrument_key, None)
+            if waiter is not None:
+                loop, first_tick = waiter
+                try:
+                    loop.call_soon_threadsafe(self._resolve_first_tick, first_tick)
+                except RuntimeError:  # the waiting loop has already closed
+                    pass
+
+    @staticmethod
+    def _resolve_first_tick(first_tick: asyncio.Future) -> None:
+        if not first_tick.done():  # may have timed out meanwhile
+            first_tick.set_result(None)
+
+    async def _feed_ltp(self, instrument_key: str) -> Optional[LtpQuote]:
+        """Latest pushed quote; waits for the first tick only once, None if missing or stale."""
+        first_tick: Optional[asyncio.Future] = None
+        with self._ws_lock:
+            if instrument_key in self._ltp_unwaited:
+                self._ltp_unwaited.discard(instrument_key)
+                if instrument_key not in self._ltp_cache:
+                    loop = asyncio.get_running_loop()
+                    first_tick = loop.create_future()
+                    self._ltp_waiters[instrument_key] = (loop, first_tick)
+        if first_tick is not None:
+            try:
+                await asyncio.wait_for(first_tick, self.ws_first_tick_timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._ws_lock:
+                    self._ltp_waiters.pop(instrument_key, None)
+        with self._ws_lock:
+            cached = self._ltp_cache.get(instrument_key)
+        if cached is None or time.monotonic() - cached[0] > self.ws_max_quote_age:
+            return None
+        return cached[1]
+
     # ---------------------- Market data -----------------------
-    def get_ltp(self, instrument_key: str) -> LtpQuote:
+    async def get_ltp(self, instrument_key: str) -> LtpQuote:
+        if instrument_key in self._ws_keys:
+            quote = await self._feed_ltp(instrument_key)
+            if quote is not None:
+                return quote
+            # Feed silent or stale: fall through to the cached REST path
+
+        simulated = self.dry_run and not self.config.access_token
+        if self.ltp_ttl <= 0 or simulated:
+            return (await self.get_ltps([instrument_key]))[instrument_key]
+
+        cached = self._ltp_ttl_cache.get(instrument_key)
+        if cached is not None and time.monotonic() - cached[0] < self.ltp_ttl:
+            return cached[1]
+        task = self._ltp_inflight.get(instrument_key)
+        if task is None:
+            task = asyncio.ensure_future(self.get_ltps([instrument_key]))
+            self._ltp_inflight[instrument_key] = task
+            task.add_done_callback(lambda done: self._ltp_fetched(instrument_key, done))
+        # Shielded so one cancelled caller does not cancel the fetch the others are waiting on
+        return (await asyncio.shield(task))[instrument_key]
+
+    def _ltp_fetched(self, instrument_key: str, task: asyncio.Task) -> None:
+        self._ltp_inflight.pop(instrument_key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._ltp_ttl_cache[instrument_key] = (time.monotonic(), task.result()[instrument_key])
+
+    async def get_ltps(self, instrument_keys: list[str]) -> Dict[str, LtpQuote]:
+        """Quotes for several instruments, fetched in as few HTTP round-trips as possible."""
+        keys = list(dict.fromkeys(instrument_keys))
+
         # Simulated price path for dry-run without credentials
         if self.dry_run and not self.config.access_token:
-            # Deterministic pseudo base from key; smooth oscillation over time
-            seed = (hash(instrument_key) % 1000) / 1000.0
-            base = 100.0 + 50.0 * seed
-            t = time.time()
-            price = base + 2.0 * math.sin(t / 10.0 + seed * 10.0) + 0.8 * math.sin(t / 3.0 + seed)
-            return LtpQuote(instrument_key=instrument_key, last_price=float(round(price, 2)), timestamp=None)
+            return {key: self._simulated_ltp(key) for key in keys}
+
+        # Pushed quotes from the websocket feed when subscribed; first-tick waits run together
+        subscribed = [key for key in keys if key in self._ws_keys]
+        fed = dict(zip(subscribed, await asyncio.gather(*(self._feed_ltp(key) for key in subscribed))))
+        quotes: Dict[str, LtpQuote] = {}
+        pending: list[str] = []
+        for key in keys:
+            quote = fed.get(key)
+            if quote is not None:
+                quotes[key] = quote
+            else:
+                pending.append(key)
+        if not pending:
+            return quotes
 
         # Prefer HTTP v2 endpoint if token present
         if self.config.access_token:
-            params = {"instrument_key": instrument_key}
-            data = self._request("GET", "/market/quotes/ltp", params=params)
-            # Try common shapes
-            last_price: Optional[float] = None
-            timestamp: Optional[str] = None
-            if isinstance(data.get("data"), dict):
-                node = data["data"].get(instrument_key) or next(iter(data["data"].values()), None)
-                if isinstance(node, dict):
-                    last_price = (
-                        node.get("ltp")
-                        or node.get("last_price")
-                        or node.get("last_traded_price")
-                        or node.get("close")
-                    )
-                    timestamp = node.get("timestamp") or node.get("exchange_timestamp")
-            if last_price is None and isinstance(data.get("ltp"), (int, float)):
-                last_price = float(data["ltp"])
-            if last_price is None:
-                raise RuntimeError(f"Unexpected LTP response shape: {json.dumps(data)[:500]}")
-            return LtpQuote(instrument_key=instrument_key, last_price=float(last_price), timestamp=timestamp)
+            batches = await asyncio.gather(*(
+                self._fetch_ltps(pending[start:start + LTP_BATCH_SIZE])
+                for start in range(0, len(pending), LTP_BATCH_SIZE)
+            ))
+            for batch in batches:
+                quotes.update(batch)
+            return quotes
 
         # Fallback to SDK if available
         if self._sdk is not None and HAS_UPSTOX_SDK:
-            # Instrument key format assumed as "EXCHANGE|SYMBOL" or "EXCHANGE:SYMBOL"
-            delimiter = "|" if "|" in instrument_key else ":"
-            exchange, symbol = instrument_key.split(delimiter, 1)
-            instrument = self._sdk.get_instrument_by_symbol(exchange, symbol)
-            feed = self._sdk.get_live_feed(instrument, LiveFeedType.LTP)
-            ltp_value = feed.get("ltp") or feed.get("last_price")
-            if ltp_value is None:
-                raise RuntimeError(f"Unexpected SDK LTP response: {feed}")
-            return LtpQuote(instrument_key=instrument_key, last_price=float(ltp_value), timestamp=feed.get("timestamp"))
+            # The SDK is blocking; keep it off the event loop
+            for key in pending:
+                quotes[key] = await asyncio.to_thread(self._sdk_ltp, key)
+            return quotes
 
         raise RuntimeError("No Upstox credentials available for LTP. Provide UPSTOX_ACCESS_TOKEN.")
 
+    def _sim_params_for(self, instrument_key: str) -> Tuple[float, float, float]:
+        params = self._sim_params.get(instrument_key)
+        if params is None:
+            # Deterministic pseudo base from key; crc32 is stable across processes, unlike hash()
+            seed = (zlib.crc32(instrument_key.encode("utf-8")) % 1000) / 1000.0
+            params = self._sim_params[instrument_key] = (100.0 + 50.0 * seed, seed * 10.0, seed)
+        return params
+
+    def _simulated_ltp(self, instrument_key: str) -> LtpQuote:
+        # Smooth oscillation over time around the per-key base
+        base, phase1, phase2 = self._sim_params_for(instrument_key)
+        t = time.time()
+        price = base + 2.0 * math.sin(t * 0.1 + phase1) + 0.8 * math.sin(t * _ONE_THIRD + phase2)
+        return LtpQuote(instrument_key=instrument_key, last_price=float(round(price, 2)), timestamp=None)
+
+    def get_ltp_series(self, instrument_key: str, times: Any) -> Any:
+        """Simulated LTPs for an array of epoch seconds, computed in one NumPy pass."""
+        np = _import_numpy("get_ltp_series")
+        base, phase1, phase2 = self._sim_params_for(instrument_key)
+        times = np.asarray(times, dtype=float)
+        prices = base + 2.0 * np.sin(times * 0.1 + phase1) + 0.8 * np.sin(times * _ONE_THIRD + phase2)
+        return np.round(prices, 2)
+
+    async def _fetch_ltps(self, instrument_keys: list[str]) -> Dict[str, LtpQuote]:
+        if len(instrument_keys) == 1:
+            key = instrument_keys[0]
+            params = self._ltp_params.get(key) or self._ltp_params.setdefault(key, {"instrument_key": key})
+        else:
+            params = {"instrument_key": ",".join(instrument_keys)}
+        resp = await self._send("GET", "/market/quotes/ltp", params=params)
+
+        # Fixed-schema decode straight into structs; anything unexpected takes the generic path
+        if HAS_MSGSPEC and resp.is_success:
+            try:
+                nodes = _LTP_DECODER.decode(resp.content).data
+            except msgspec.MsgspecError:
+                nodes = None
+            if nodes is not None:
+                quotes = self._match_ltp_nodes(
+                    instrument_keys, nodes, lambda node: node.instrument_token, _quote_from_ltp_struct
+                )
+                if len(quotes) == len(instrument_keys):
+                    return quotes
+
+        data = self._parse_response(resp)
+        single = instrument_keys[0] if len(instrument_keys) == 1 else None
+        quotes = {}
+        if isinstance(data.get("data"), dict):
+            nodes = {key: node for key, node in data["data"].items() if isinstance(node, dict)}
+            quotes = self._match_ltp_nodes(
+                instrument_keys, nodes, lambda node: node.get("instrument_token"), self._parse_ltp_node
+            )
+        if single is not None and single not in quotes and isinstance(data.get("ltp"), (int, float)):
+            quotes[single] = LtpQuote(instrument_key=single, last_price=float(data["ltp"]), timestamp=None)
+        missing = [key for key in instrument_keys if key not in quotes]
+        if missing:
+            raise RuntimeError(f"Unexpected LTP response shape for {missing[:5]}: {orjson.dumps(data)[:500].decode(errors='replace')}")
+        return quotes
+
+    @staticmethod
+    def _match_ltp_nodes(
+        instrument_keys: list[str],
+        nodes: Dict[str, Any],
+        token_of: Callable[[Any], Optional[str]],
+        parse: Callable[[str, Any], Optional[LtpQuote]],
+    ) -> Dict[str, LtpQuote]:
+        wanted = set(instrument_keys)
+        single = instrument_keys[0] if len(instrument_keys) == 1 else None
+        quotes: Dict[str, LtpQuote] = {}
+        for response_key, node in nodes.items():
+            # v2 keys responses by EXCHANGE:SYMBOL; instrument_token echoes the requested key
+            key = response_key if response_key in wanted else token_of(node)
+            if key not in wanted:
+                if single is None or single in quotes:
+                    continue
+                key = single
+            quote = parse(key, node)
+            if quote is not None:
+                quotes[key] = quote
+        return quotes
+
+    def _parse_ltp_node(self, instrument_key: str, node: Dict[str, Any]) -> Optional[LtpQuote]:
+        parse = self._ltp_parse_fn
+        if parse is not None:
+            try:
+                return parse(instrument_key, node)
+            except (KeyError, TypeError, ValueError):
+                # Shape changed underneath us; relearn it below
+                self._ltp_parse_fn = None
+
+        # Try common shapes
+        price_field = next((field for field in _LTP_PRICE_FIELDS if node.get(field)), None)
+        if price_field is None:
+            # Nothing truthy: the or-chain yields the last field's value as-is (e.g. close=0)
+            last_price = node.get(_LTP_PRICE_FIELDS[-1])
+            if last_price is None:
+                return None
+            return LtpQuote(
+                instrument_key=instrument_key,
+                last_price=float(last_price),
+                timestamp=node.get("timestamp") or node.get("exchange_timestamp"),
+            )
+        self._ltp_parse_fn = parse = self._compile_ltp_parser(price_field)
+        return parse(instrument_key, node)
+
+    @staticmethod
+    def _compile_ltp_parser(price_field: str) -> Callable[[str, Dict[str, Any]], LtpQuote]:
+        # Fields the or-chain would prefer over the learned one (none when it learned "ltp")
+        outranking = _LTP_PRICE_FIELDS[:_LTP_PRICE_FIELDS.index(price_field)]
+
+        def parse(instrument_key: str, node: Dict[str, Any]) -> LtpQuote:
+            for field in outranking:
+                if node.get(field):
+                    raise ValueError(f"{field} outranks {price_field}")
+            last_price = node[price_field]
+            if not last_price:
+                # A falsy price defers to the next field, as in the or-chain
+                raise ValueError(f"empty {price_field}")
+            return LtpQuote(
+                instrument_key=instrument_key,
+                last_price=float(last_price),
+                timestamp=node.get("timestamp") or node.get("exchange_timestamp"),
+            )
+        return parse
+
+    def _sdk_ltp(self, instrument_key: str) -> LtpQuote:
+        # Instrument key format assumed as "EXCHANGE|SYMBOL" or "EXCHANGE:SYMBOL"
+        delimiter = "|" if "|" in instrument_key else ":"
+        exchange, symbol = instrument_key.split(delimiter, 1)
+        instrument = self._sdk.get_instrument_by_symbol(exchange, symbol)
+        feed = self._sdk.get_live_feed(instrument, LiveFeedType.LTP)
+        ltp_value = feed.get("ltp") or feed.get("last_price")
+        if ltp_value is None:
+            raise RuntimeError(f"Unexpected SDK LTP response: {feed}")
+        return LtpQuote(instrument_key=instrument_key, last_price=float(ltp_value), timestamp=feed.get("timestamp"))
+
     # ---------------------- Orders ----------------------------
-    def place_market_order(
+    async def place_market_order(
         self,
         *,
         instrument_key: str,
@@ -152,31 +655,38 @@ class UpstoxClient:
         # Prefer HTTP v2 endpoint
         if self.config.access_token:
             payload = {
+                **self._ORDER_TEMPLATE,
                 "instrument_key": instrument_key,
                 "quantity": int(quantity),
                 "product": product,
                 "transaction_type": transaction_type,
-                "order_type": "MARKET",
                 "validity": validity,
-                "tag": tag,
             }
-            data = self._request("POST", "/order/place", json=payload)
+            # Only send tag when set; the API treats an explicit null as a field
+            if tag:
+                payload["tag"] = tag
+            data = await self._request("POST", "/order/place", content=orjson.dumps(payload))
             return data
 
         # Fallback to SDK if available
         if self._sdk is not None and HAS_UPSTOX_SDK:
-            delimiter = "|" if "|" in instrument_key else ":"
-            exchange, symbol = instrument_key.split(delimiter, 1)
-            instrument = self._sdk.get_instrument_by_symbol(exchange, symbol)
-            sdk_side = TransactionType.Buy if transaction_type == "BUY" else TransactionType.Sell
-            response = self._sdk.place_order(
-                transaction_type=sdk_side,
-                instrument=instrument,
-                quantity=int(quantity),
-                order_type=OrderType.Market,
-                product=ProductType.Intraday if product == "I" else ProductType.Delivery,
-                price=0.0,
+            response = await asyncio.to_thread(
+                self._sdk_place_market_order, instrument_key, transaction_type, quantity, product
             )
             return {"data": response}
 
         raise RuntimeError("No Upstox credentials available for orders. Provide UPSTOX_ACCESS_TOKEN.")
+
+    def _sdk_place_market_order(self, instrument_key: str, transaction_type: str, quantity: int, product: str) -> Any:
+        delimiter = "|" if "|" in instrument_key else ":"
+        exchange, symbol = instrument_key.split(delimiter, 1)
+        instrument = self._sdk.get_instrument_by_symbol(exchange, symbol)
+        sdk_side = TransactionType.Buy if transaction_type == "BUY" else TransactionType.Sell
+        return self._sdk.place_order(
+            transaction_type=sdk_side,
+            instrument=instrument,
+            quantity=int(quantity),
+            order_type=OrderType.Market,
+            product=ProductType.Intraday if product == "I" else ProductType.Delivery,
+            price=0.0,
+        )